@@ -0,0 +1,34 @@
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # no numba wheel for this platform; fall back to plain Python loops.
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def decorator(fn):
+            return fn
+
+        return decorator
+
+
+@njit(cache=True)
+def ema_pair_advance(closes: np.ndarray, fast_span: int, slow_span: int, fast: float, slow: float):
+    """Continue a fast and a slow EMA from previous values in one pass over new closes."""
+    a_fast = 2.0 / (fast_span + 1)
+    a_slow = 2.0 / (slow_span + 1)
+    for i in range(closes.shape[0]):
+        # Bars are float32; widen each close so the state accumulates in float64 with or
+        # without numba.
+        c = float(closes[i])
+        fast = a_fast * c + (1.0 - a_fast) * fast
+        slow = a_slow * c + (1.0 - a_slow) * slow
+    return fast, slow
+
+
+def ema_pair_last(closes: np.ndarray, fast_span: int, slow_span: int):
+    """Last values of two EMAs matching pandas ewm(span=..., adjust=False)."""
+    seed = float(closes[0])
+    return ema_pair_advance(closes[1:], fast_span, slow_span, seed, seed)
+
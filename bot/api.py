@@ -1,11 +1,21 @@
-from fastapi import FastAPI
+import orjson
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from .config import API_HOST, API_PORT
 from .shared import LOG_BUFFER, SNAPSHOTS
 
+# Handlers only read in-memory snapshots, so they run on the event loop and use orjson.
+# Returning responses directly skips FastAPI's jsonable_encoder walk for JSON-native data.
 app = FastAPI(title="Trading Bot API", version="1.0.0")
 
+
+def _json(payload) -> Response:
+    return Response(
+        content=orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY),
+        media_type="application/json",
+    )
+
 # Add CORS middleware to allow cross-origin requests
 app.add_middleware(
     CORSMiddleware,
@@ -17,42 +27,54 @@ app.add_middleware(
 
 
 @app.get("/health")
-def health():
-    return {"status": "ok"}
+async def health():
+    return _json({"status": "ok"})
 
 
 @app.get("/logs")
-def logs(limit: int = 200):
-    return {"logs": LOG_BUFFER.latest(limit=limit)}
+async def logs(limit: int = 200):
+    return _json({"logs": LOG_BUFFER.latest(limit=limit)})
 
 
 @app.get("/snapshot")
-def snapshot():
-    return SNAPSHOTS.get()
+async def snapshot():
+    return Response(content=SNAPSHOTS.get_json(), media_type="application/json")
 
 
 @app.get("/status")
-def status():
-    return SNAPSHOTS.get().get("status", {})
+async def status():
+    return _json(SNAPSHOTS.get().get("status", {}))
 
 
 @app.get("/metrics")
-def metrics():
-    return SNAPSHOTS.get().get("metrics", {})
+async def metrics():
+    return _json(SNAPSHOTS.get().get("metrics", {}))
 
 
 @app.get("/positions")
-def positions():
-    return SNAPSHOTS.get().get("positions", [])
+async def positions():
+    return _json(SNAPSHOTS.get().get("positions", []))
 
 
 @app.get("/candidates")
-def candidates():
-    return SNAPSHOTS.get().get("candidates", [])
+async def candidates():
+    return _json(SNAPSHOTS.get().get("candidates", []))
 
 
 def run_api():
+    import importlib.util
+
     import uvicorn
 
-    uvicorn.run(app, host=API_HOST, port=API_PORT, log_level="info")
+    # uvloop + httptools cut per-request overhead; uvloop is not available on Windows.
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    uvicorn.run(
+        app,
+        host=API_HOST,
+        port=API_PORT,
+        log_level="warning",
+        access_log=False,
+        loop=loop,
+        http="httptools",
+    )
 
@@ -53,6 +53,10 @@ TIMEFRAME = TimeFrame(5, TimeFrameUnit.Minute)  # Single timeframe by design
 EMA_FAST = 21  # Pullback anchor
 EMA_SLOW = 50  # Trend filter
 UNIVERSE_SCAN_LIMIT = 40  # Max symbols to score per scan to avoid rate limits
+UNIVERSE_CACHE_TTL = 3600  # Seconds to reuse the tradable asset list between scans
+FETCH_WORKERS = 8  # Parallel bar requests per scan (I/O bound)
+CLOCK_CACHE_TTL = 900  # Max seconds to reuse the market clock before its next scheduled open/close
+BENCHMARK_CACHE_TTL = 300  # Seconds to reuse benchmark returns (one 5-minute bar)
 VOLUME_ACCEL_THRESHOLD = 1.5  # 150% of recent average
 PULLBACK_TOLERANCE_PCT = 0.003  # Price near EMA(21) within 0.3%
 BENCHMARKS = ["SPY", "QQQ"]
@@ -85,5 +89,9 @@ TRADING_WINDOW_END = dt_time(15, 30)   # Exit 30 minutes before close
 
 # System behavior
 CHECK_INTERVAL = 60  # seconds between checks
+DEBUG_TREND_EMAS = os.getenv("BOT_DEBUG_TREND_EMAS", "0") == "1"  # Keep raw EMA21/EMA50 on candidates
 STATE_FILE = "bot_state.json"
+STATE_SAVE_DEBOUNCE = 0.5  # seconds to coalesce state writes
+METRICS_LOG_FILE = "metrics.log"  # append-only trade events between state checkpoints
+METRICS_CHECKPOINT_EVERY = 20  # closed trades per full state checkpoint
 
@@ -1,16 +1,29 @@
+import functools
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 from alpaca_trade_api.rest import REST
 
+from ._ema import ema_pair_advance, ema_pair_last
 from .config import (
     BENCHMARKS,
+    BENCHMARK_CACHE_TTL,
+    CLOCK_CACHE_TTL,
+    DEBUG_TREND_EMAS,
+    EMA_FAST,
+    EMA_SLOW,
+    FETCH_WORKERS,
     TIMEFRAME,
     TIMEZONE,
     TOP_TRENDING_LIMIT,
     TRADING_WINDOW_END,
     TRADING_WINDOW_START,
+    UNIVERSE_CACHE_TTL,
     UNIVERSE_SCAN_LIMIT,
     VOLUME_ACCEL_THRESHOLD,
     MAX_SPREAD_ABS,
@@ -18,12 +31,61 @@ from .config import (
     MIN_BAR_DOLLAR_VOL,
 )
 
+# Tradability flags rarely change intraday, so the filtered asset list is reused.
+_ASSETS_CACHE: Dict[str, object] = {"ts": None, "symbols": []}
+
+# Market clock: open/closed only flips at the scheduled next_open/next_close, so the answer
+# is reused until then (capped at CLOCK_CACHE_TTL in case the schedule changes).
+_CLOCK_CACHE: Dict[str, object] = {"until": 0.0, "is_open": False}
+
+# Per-symbol EMA state: (ema21, ema50, first_bar_ts, last_completed_bar_ts) so each scan
+# only folds in bars that completed since the previous one. The newest bar may still be
+# forming (and late prints revise it), so it is applied on top and never cached.
+_EMA_STATE: Dict[str, Tuple[float, float, np.datetime64, np.datetime64]] = {}
+
+# Bars are passed around as plain arrays (open/high/low/close/volume as float32,
+# ts as UTC datetime64[ns]) rather than DataFrames.
+BarArrays = Dict[str, np.ndarray]
+
+
+def _ttl_cache(ttl: float, align: bool = False, cache_if: Optional[Callable[[object], bool]] = None):
+    """
+    Memoize a function on its positional args for `ttl` seconds.
+    With `align`, entries also expire at wall-clock multiples of `ttl` (e.g. bar boundaries).
+    With `cache_if`, results it rejects (e.g. from a failed fetch) are returned but not kept.
+    """
+    def decorator(fn):
+        cache: Dict[tuple, Tuple[float, Optional[int], object]] = {}
+
+        @functools.wraps(fn)
+        def wrapper(*args):
+            now = time.monotonic()
+            bucket = int(time.time() // ttl) if align else None
+            hit = cache.get(args)
+            if hit is not None and hit[1] == bucket and now - hit[0] < ttl:
+                return hit[2]
+            value = fn(*args)
+            if cache_if is None or cache_if(value):
+                cache[args] = (now, bucket, value)
+            return value
+
+        return wrapper
+
+    return decorator
+
 
 def is_market_open(api: REST) -> bool:
     """Use Alpaca clock to avoid local time mistakes."""
+    now = time.time()
+    if now < _CLOCK_CACHE["until"]:
+        return _CLOCK_CACHE["is_open"]
     try:
         clock = api.get_clock()
-        return bool(clock.is_open)
+        is_open = bool(clock.is_open)
+        flip = clock.next_close if is_open else clock.next_open
+        _CLOCK_CACHE["until"] = min(flip.timestamp(), now + CLOCK_CACHE_TTL)
+        _CLOCK_CACHE["is_open"] = is_open
+        return is_open
     except Exception:
         return False
 
@@ -49,89 +111,183 @@ def fetch_recent_bars(api: REST, symbol: str, limit: int = 300) -> Optional[pd.D
         return None
 
 
+def bars_to_soa(bars: pd.DataFrame) -> BarArrays:
+    """Convert a bars DataFrame into per-column arrays for the numeric hot paths."""
+    return {
+        "open": bars["open"].to_numpy(np.float32),
+        "high": bars["high"].to_numpy(np.float32),
+        "low": bars["low"].to_numpy(np.float32),
+        "close": bars["close"].to_numpy(np.float32),
+        "volume": bars["volume"].to_numpy(np.float32),
+        "ts": bars.index.values,
+    }
+
+
+def fetch_recent_bars_multi(api: REST, symbols: List[str], limit: int = 300) -> Dict[str, BarArrays]:
+    """
+    Fetch recent 5-minute bars for many symbols in a single request.
+    Falls back to parallel per-symbol requests if the batched call fails.
+    """
+    if not symbols:
+        return {}
+    try:
+        # The data API applies `limit` across all symbols combined, so trim per symbol instead.
+        bars = api.get_bars(list(symbols), TIMEFRAME).df
+    except Exception as exc:
+        print(f"Warning: batched bar request failed, fetching per symbol: {exc}")
+        with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as ex:
+            futures = {ex.submit(fetch_recent_bars, api, sym, limit): sym for sym in symbols}
+            results = {futures[fut]: fut.result() for fut in as_completed(futures)}
+        return {sym: bars_to_soa(bars) for sym, bars in results.items() if bars is not None}
+
+    if bars.empty or "symbol" not in bars.columns:
+        return {}
+    # Normalize timezone to Eastern for clear comparisons.
+    if bars.index.tz is None:
+        bars = bars.tz_localize("UTC")
+    bars = bars.tz_convert(TIMEZONE)
+    return {
+        sym: bars_to_soa(group.iloc[:limit])
+        for sym, group in bars.groupby("symbol", sort=False)
+    }
+
+
+def _quote_spread_ok(q) -> bool:
+    """Check one latest quote's bid-ask spread against configured thresholds."""
+    if q is None:
+        return False
+    bid = float(q.bid_price)
+    ask = float(q.ask_price)
+    if bid <= 0 or ask <= 0 or ask < bid:
+        return False
+    spread = ask - bid
+    pct = spread / bid
+    return spread <= MAX_SPREAD_ABS and pct <= MAX_SPREAD_PCT
+
+
 def latest_spread_ok(api: REST, symbol: str) -> bool:
     """Check bid-ask spread against configured thresholds."""
     try:
-        q = api.get_latest_quote(symbol)
-        bid = float(q.bidprice)
-        ask = float(q.askprice)
-        if bid <= 0 or ask <= 0 or ask < bid:
-            return False
-        spread = ask - bid
-        pct = spread / bid
-        return spread <= MAX_SPREAD_ABS and pct <= MAX_SPREAD_PCT
+        return _quote_spread_ok(api.get_latest_quote(symbol))
     except Exception:
         return False
 
 
-def bar_meets_dollar_volume(bars: pd.DataFrame) -> bool:
+def latest_spreads_ok(api: REST, symbols: List[str]) -> Dict[str, bool]:
+    """Spread check for many symbols using one latest-quotes request."""
+    if not symbols:
+        return {}
+    try:
+        quotes = api.get_latest_quotes(list(symbols))
+    except Exception:
+        return {sym: False for sym in symbols}
+    result: Dict[str, bool] = {}
+    for sym in symbols:
+        try:
+            result[sym] = _quote_spread_ok(quotes.get(sym))
+        except Exception:
+            result[sym] = False
+    return result
+
+
+def bar_meets_dollar_volume(bars: Optional[BarArrays]) -> bool:
     """Ensure the most recent bar has enough dollar volume to avoid illiquidity."""
-    if bars is None or bars.empty:
+    if bars is None or len(bars["close"]) == 0:
         return False
-    last = bars.iloc[-1]
-    dollar_vol = float(last["close"] * last["volume"])
-    return dollar_vol >= MIN_BAR_DOLLAR_VOL
+    return bool(bars["close"][-1] * bars["volume"][-1] >= MIN_BAR_DOLLAR_VOL)
 
 
-def _returns_from_bars(bars: pd.DataFrame, bars_back: int) -> Optional[float]:
-    if len(bars) < bars_back + 1:
+def _returns_from_bars(bars: BarArrays, bars_back: int) -> Optional[float]:
+    closes = bars["close"]
+    if len(closes) < bars_back + 1:
         return None
-    now = float(bars["close"].iloc[-1])
-    past = float(bars["close"].iloc[-(bars_back + 1)])
+    now = float(closes[-1])
+    past = float(closes[-(bars_back + 1)])
     if past <= 0:
         return None
     return (now - past) / past
 
 
-def compute_intraday_performance(bars: pd.DataFrame) -> Dict[str, Optional[float]]:
+def compute_intraday_performance(bars: BarArrays) -> Dict[str, Optional[float]]:
     """Calculate 1h, 3h, and day (open-to-now) returns using 5-minute bars only."""
     result: Dict[str, Optional[float]] = {"ret_1h": None, "ret_3h": None, "ret_day": None}
     result["ret_1h"] = _returns_from_bars(bars, 12)   # 12 bars ~ 1 hour
     result["ret_3h"] = _returns_from_bars(bars, 36)   # 36 bars ~ 3 hours
-    day_open = float(bars["open"].iloc[0])
-    last = float(bars["close"].iloc[-1])
+    day_open = float(bars["open"][0])
+    last = float(bars["close"][-1])
     if day_open > 0:
         result["ret_day"] = (last - day_open) / day_open
     return result
 
 
-def compute_volume_ratio(bars: pd.DataFrame) -> Optional[float]:
+def compute_volume_ratio(bars: BarArrays) -> Optional[float]:
     """Current bar volume vs average of last 20 bars."""
-    if len(bars) < 21:
+    volumes = bars["volume"]
+    if len(volumes) < 21:
         return None
-    current_vol = float(bars["volume"].iloc[-1])
-    avg_vol = float(bars["volume"].iloc[-21:-1].mean())
+    current_vol = float(volumes[-1])
+    avg_vol = float(volumes[-21:-1].mean())
     if avg_vol <= 0:
         return None
     return current_vol / avg_vol
 
 
-def compute_trend(bars: pd.DataFrame) -> Tuple[bool, float, float]:
-    ema21 = bars["close"].ewm(span=21, adjust=False).mean()
-    ema50 = bars["close"].ewm(span=50, adjust=False).mean()
-    last = len(bars) - 1
-    strong_trend = ema21.iloc[last] > ema50.iloc[last] and bars["close"].iloc[last] > ema21.iloc[last]
-    return strong_trend, float(ema21.iloc[last]), float(ema50.iloc[last])
+def completed_emas(bars: BarArrays, symbol: Optional[str] = None) -> Tuple[float, float]:
+    """EMA21 / EMA50 through the last completed bar (ts[-2]); needs at least two bars."""
+    closes = bars["close"]
+    ts = bars["ts"]
+    done = ts[-2]
+    prior = _EMA_STATE.get(symbol) if symbol else None
+    if prior is not None and prior[2] == ts[0] and prior[3] <= done:
+        # Same window as last scan: only advance over bars completed since the cached one.
+        start = np.searchsorted(ts, prior[3], side="right")
+        ema21, ema50 = ema_pair_advance(closes[start:-1], EMA_FAST, EMA_SLOW, prior[0], prior[1])
+    else:
+        ema21, ema50 = ema_pair_last(closes[:-1], EMA_FAST, EMA_SLOW)
+    ema21, ema50 = float(ema21), float(ema50)
+    if symbol:
+        _EMA_STATE[symbol] = (ema21, ema50, ts[0], done)
+    return ema21, ema50
+
 
+def current_emas(bars: BarArrays, symbol: Optional[str] = None) -> Tuple[float, float]:
+    """EMA21 / EMA50 including the newest (possibly still forming) bar."""
+    ema21, ema50 = completed_emas(bars, symbol)
+    ema21, ema50 = ema_pair_advance(bars["close"][-1:], EMA_FAST, EMA_SLOW, ema21, ema50)
+    return float(ema21), float(ema50)
 
+
+def compute_trend(bars: BarArrays, symbol: Optional[str] = None) -> Tuple[bool, float]:
+    """Return (strong_trend, trend_slope) where slope is EMA21 / EMA50 - 1."""
+    ema21, ema50 = current_emas(bars, symbol)
+    strong_trend = ema21 > ema50 and float(bars["close"][-1]) > ema21
+    trend_slope = (ema21 / ema50 - 1) if ema50 else 0.0
+    return strong_trend, trend_slope
+
+
+# Only complete results are cached: after a failed fetch the next cycle retries instead of
+# running the relative-strength gate against a 0.0 fallback for the rest of the bar.
+@_ttl_cache(BENCHMARK_CACHE_TTL, align=True, cache_if=lambda perf: len(perf) == len(BENCHMARKS))
 def benchmark_performance(api: REST) -> Dict[str, float]:
     """Return intraday performance for benchmarks (SPY, QQQ) using 5-minute bars."""
     perf: Dict[str, float] = {}
+    results = fetch_recent_bars_multi(api, BENCHMARKS, limit=120)
     for sym in BENCHMARKS:
-        bars = fetch_recent_bars(api, sym, limit=120)
-        if bars is None or bars.empty:
+        bars = results.get(sym)
+        if bars is None or len(bars["close"]) == 0:
             continue
-        day_open = float(bars["open"].iloc[0])
-        last = float(bars["close"].iloc[-1])
+        day_open = float(bars["open"][0])
+        last = float(bars["close"][-1])
         perf[sym] = (last - day_open) / day_open if day_open > 0 else 0.0
     return perf
 
 
-def build_trending_universe(api: REST) -> List[Dict]:
-    """
-    Fetch a universe of tradable symbols and rank by momentum + trend + volume.
-    Uses only intraday 5-minute data to avoid timeframe mixing.
-    """
+def _get_universe_candidates(api: REST) -> List[str]:
+    """Return tradable symbols to scan, refreshing the asset list at most once per TTL."""
+    ts = _ASSETS_CACHE["ts"]
+    if ts is not None and time.monotonic() - ts < UNIVERSE_CACHE_TTL:
+        return _ASSETS_CACHE["symbols"]
+
     candidates: List[str] = []
     try:
         assets = api.list_assets(status="active", asset_class="us_equity")
@@ -142,51 +298,82 @@ def build_trending_universe(api: REST) -> List[Dict]:
                 continue
             if asset.symbol is None or len(asset.symbol) > 4:
                 continue
-            candidates.append(asset.symbol)
+            # Interned so every per-symbol dict key downstream shares one string object.
+            candidates.append(sys.intern(asset.symbol))
     except Exception as exc:
         print(f"Warning: could not list assets, using empty universe: {exc}")
         return []
 
-    ranked: List[Dict] = []
-    for sym in candidates:
-        bars = fetch_recent_bars(api, sym, limit=120)
-        if bars is None or len(bars) < 60:
-            continue
+    _ASSETS_CACHE["ts"] = time.monotonic()
+    _ASSETS_CACHE["symbols"] = candidates
+    return candidates
 
-        perf = compute_intraday_performance(bars)
-        vol_ratio = compute_volume_ratio(bars)
-        strong_trend, ema21, ema50 = compute_trend(bars)
-        if not strong_trend or vol_ratio is None or vol_ratio < VOLUME_ACCEL_THRESHOLD:
-            continue
 
-        ret_1h = perf["ret_1h"] or 0
-        ret_3h = perf["ret_3h"] or 0
-        ret_day = perf["ret_day"] or 0
-
-        # Unified signal strength score: momentum + volume + trend slope
-        trend_slope = (ema21 / ema50 - 1) if ema50 else 0
-        score = (
-            (ret_1h * 100) * 0.4
-            + (ret_3h * 100) * 0.35
-            + (ret_day * 100) * 0.25
-            + (vol_ratio - 1) * 10
-            + trend_slope * 200
-        )
-
-        ranked.append(
-            {
-                "symbol": sym,
-                "score": score,
-                "bars": bars,
-                "ret_day": ret_day,
-                "ret_1h": perf["ret_1h"],
-                "ret_3h": perf["ret_3h"],
-                "vol_ratio": vol_ratio,
-                "ema21": ema21,
-                "ema50": ema50,
-            }
-        )
-
-    ranked.sort(key=lambda x: x["score"], reverse=True)
-    return ranked[:TOP_TRENDING_LIMIT]
+def _pct_change(now: np.ndarray, past: np.ndarray) -> np.ndarray:
+    """Element-wise (now - past) / past, NaN where past is not positive."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(past > 0, (now - past) / past, np.nan)
+
+
+def _float_or_none(val: float) -> Optional[float]:
+    return None if np.isnan(val) else float(val)
+
 
+def build_trending_universe(api: REST) -> List[Dict]:
+    """
+    Fetch a universe of tradable symbols and rank by momentum + trend + volume.
+    Uses only intraday 5-minute data to avoid timeframe mixing.
+    """
+    candidates = _get_universe_candidates(api)
+    if not candidates:
+        return []
+
+    bars_by_symbol = fetch_recent_bars_multi(api, candidates, limit=120)
+    symbols = [sym for sym in candidates if sym in bars_by_symbol and len(bars_by_symbol[sym]["close"]) >= 60]
+    if not symbols:
+        return []
+    series = [bars_by_symbol[sym] for sym in symbols]
+
+    # Every symbol has >= 60 bars, so fixed-width tails line up into (N, T) arrays.
+    closes = np.stack([b["close"][-37:] for b in series])
+    volumes = np.stack([b["volume"][-21:] for b in series])
+    day_opens = np.array([b["open"][0] for b in series], dtype=np.float32)
+    last = closes[:, -1]
+
+    ret_1h = _pct_change(last, closes[:, -13])       # 12 bars ~ 1 hour
+    ret_3h = _pct_change(last, closes[:, -37])       # 36 bars ~ 3 hours
+    ret_day = _pct_change(last, day_opens)
+    avg_vol = volumes[:, :-1].mean(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vol_ratio = np.where(avg_vol > 0, volumes[:, -1] / avg_vol, np.nan)
+
+    trends = [compute_trend(b, sym) for sym, b in zip(symbols, series)]
+    strong_trend = np.array([t[0] for t in trends], dtype=bool)
+    trend_slope = np.array([t[1] for t in trends], dtype=float)
+
+    # Unified signal strength score: momentum + volume + trend slope
+    score = (
+        (np.nan_to_num(ret_1h) * 100) * 0.4
+        + (np.nan_to_num(ret_3h) * 100) * 0.35
+        + (np.nan_to_num(ret_day) * 100) * 0.25
+        + (vol_ratio - 1) * 10
+        + trend_slope * 200
+    )
+
+    keep = strong_trend & (vol_ratio >= VOLUME_ACCEL_THRESHOLD)
+    order = [i for i in np.argsort(-score, kind="stable") if keep[i]][:TOP_TRENDING_LIMIT]
+    ranked: List[Dict] = []
+    for i in order:
+        entry = {
+            "symbol": symbols[i],
+            "score": float(score[i]),
+            "bars": series[i],
+            "ret_day": _float_or_none(ret_day[i]) or 0,
+            "ret_1h": _float_or_none(ret_1h[i]),
+            "ret_3h": _float_or_none(ret_3h[i]),
+            "vol_ratio": float(vol_ratio[i]),
+        }
+        if DEBUG_TREND_EMAS:
+            entry["ema21"], entry["ema50"] = current_emas(series[i], symbols[i])
+        ranked.append(entry)
+    return ranked
@@ -1,13 +1,19 @@
 from datetime import datetime
-from typing import Optional, Tuple
+from typing import Dict, Optional, Set, Tuple
 
+import numpy as np
 import pandas as pd
 from alpaca_trade_api.rest import REST
 
+from ._ema import ema_pair_last
 from .config import TIMEZONE
+from .data import BarArrays
 from .risk import calculate_stop_price, trailing_stop_price
 from .shared import LOG_BUFFER
 
+# Entry fills do not change while a position is open: (symbol, day_start) -> (price, filled_at).
+_BUY_FILL_CACHE: Dict[Tuple[str, Optional[str]], Tuple[Optional[float], datetime]] = {}
+
 
 def get_position(api: REST, symbol: str):
     """Return the open position if it exists."""
@@ -35,6 +41,8 @@ def submit_market_sell(api: REST, symbol: str, qty: int, reason: str = ""):
         type="market",
         time_in_force="day",
     )
+    for key in [k for k in _BUY_FILL_CACHE if k[0] == symbol]:
+        del _BUY_FILL_CACHE[key]
     if reason:
         LOG_BUFFER.add("INFO", f"{symbol} exit: {reason}")
     return order
@@ -49,6 +57,15 @@ def has_open_order(api: REST, symbol: str) -> bool:
     return any(o.symbol == symbol for o in orders)
 
 
+def open_order_symbols(api: REST) -> Set[str]:
+    """Symbols with open orders, fetched once so callers can check many symbols cheaply."""
+    try:
+        orders = api.list_orders(status="open", limit=500)
+    except Exception:
+        return set()
+    return {o.symbol for o in orders}
+
+
 def close_symbol(api: REST, symbol: str, reason: str) -> None:
     pos = get_position(api, symbol)
     if pos:
@@ -72,6 +89,9 @@ def latest_buy_fill(api: REST, symbol: str, day_start: Optional[datetime]) -> Tu
     Used to anchor trailing-stop calculations after restarts.
     """
     after = day_start.isoformat() if day_start else None
+    cached = _BUY_FILL_CACHE.get((symbol, after))
+    if cached is not None:
+        return cached
     try:
         orders = api.list_orders(
             status="all",
@@ -87,8 +107,11 @@ def latest_buy_fill(api: REST, symbol: str, day_start: Optional[datetime]) -> Tu
             continue
         if not order.filled_at:
             continue
-        filled_at = pd.to_datetime(order.filled_at).tz_convert(TIMEZONE)
-        if after and filled_at < pd.to_datetime(after):
+        filled_at = order.filled_at
+        if isinstance(filled_at, str):
+            filled_at = datetime.fromisoformat(filled_at.replace("Z", "+00:00"))
+        filled_at = filled_at.astimezone(TIMEZONE)
+        if day_start and filled_at < day_start:
             continue
         price = None
         if order.filled_avg_price:
@@ -97,12 +120,13 @@ def latest_buy_fill(api: REST, symbol: str, day_start: Optional[datetime]) -> Tu
             price = float(order.limit_price)
         elif order.stop_price:
             price = float(order.stop_price)
+        _BUY_FILL_CACHE[(symbol, after)] = (price, filled_at)
         return price, filled_at
 
     return None, None
 
 
-def manage_open_position(api: REST, symbol: str, bars: pd.DataFrame, day_start: Optional[datetime]) -> Optional[Tuple[str, float, float]]:
+def manage_open_position(api: REST, symbol: str, bars: BarArrays, day_start: Optional[datetime]) -> Optional[Tuple[str, float, float]]:
     """
     Check exits:
     - Hard stop below entry.
@@ -114,17 +138,18 @@ def manage_open_position(api: REST, symbol: str, bars: pd.DataFrame, day_start:
         return None
 
     entry_price = float(position.avg_entry_price)
-    last_price = float(bars["close"].iloc[-1])
+    last_price = float(bars["close"][-1])
 
     # Determine entry time/price from fills to stay restart-safe.
     filled_price, filled_at = latest_buy_fill(api, symbol, day_start)
     anchor_price = filled_price or entry_price
-    entry_time = filled_at or bars.index[0]
+    ts = bars["ts"]
+    entry_ts = np.datetime64(pd.Timestamp(filled_at).value, "ns") if filled_at is not None else ts[0]
 
-    recent = bars[bars.index >= entry_time]
-    if recent.empty:
-        recent = bars
-    highest_since_entry = float(recent["high"].max())
+    # Bars are time-ordered, so a binary search finds the first bar since entry.
+    idx = int(np.searchsorted(ts, entry_ts, side="left"))
+    highs = bars["high"]
+    highest_since_entry = float(highs[idx:].max()) if idx < len(highs) else float(highs.max())
 
     stop_price = calculate_stop_price(anchor_price)
     trailing_price = trailing_stop_price(anchor_price, highest_since_entry)
@@ -140,8 +165,7 @@ def manage_open_position(api: REST, symbol: str, bars: pd.DataFrame, day_start:
         return ("trail", anchor_price, last_price, qty)
 
     # Trend flip: EMA21 below EMA50
-    ema21 = bars["close"].ewm(span=21, adjust=False).mean().iloc[-1]
-    ema50 = bars["close"].ewm(span=50, adjust=False).mean().iloc[-1]
+    ema21, ema50 = ema_pair_last(bars["close"], 21, 50)
     if ema21 < ema50:
         qty = abs(int(float(position.qty)))
         submit_market_sell(api, symbol, qty, reason="Trend flipped (21 below 50)")
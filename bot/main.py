@@ -1,6 +1,7 @@
 import threading
 import time
 from datetime import datetime
+from typing import Optional
 
 from . import data, execution, risk, strategy
 from .api import run_api
@@ -18,15 +19,16 @@ from .shared import LOG_BUFFER, SNAPSHOTS
 from .state import BotState
 
 
-def log_status(message: str) -> None:
-    ts = datetime.now(TIMEZONE).strftime("%Y-%m-%d %H:%M:%S")
-    line = f"[{ts}] {message}"
+def log_status(message: str, now: Optional[datetime] = None) -> None:
+    """Log a status line; pass the cycle's `now` to reuse one timestamp per tick."""
+    now = now or datetime.now(TIMEZONE)
+    line = f"[{now.strftime('%Y-%m-%d %H:%M:%S')}] {message}"
     print(line)
-    LOG_BUFFER.add("INFO", line)
+    LOG_BUFFER.add("INFO", line, ts=now)
 
 
 def display_dashboard(state: BotState, equity: float) -> None:
-    m = state.state["metrics"]
+    m = state.metrics
     total = m["total_trades"]
     wins = m["wins"]
     losses = m["losses"]
@@ -62,7 +64,8 @@ def display_dashboard(state: BotState, equity: float) -> None:
             "expectancy": expectancy,
             "profit_factor": profit_factor,
             "max_drawdown_pct": dd_pct,
-            "pnl_by_symbol": m.get("pnl_by_symbol", {}),
+            # Copy: the published snapshot must not alias BotState's live dict.
+            "pnl_by_symbol": dict(m["pnl_by_symbol"]),
         }
     )
 
@@ -76,7 +79,7 @@ def trading_loop() -> None:
             account = API.get_account()
             equity = float(account.equity)
         except Exception as exc:
-            log_status(f"Could not reach Alpaca API: {exc}")
+            log_status(f"Could not reach Alpaca API: {exc}", now=now)
             time.sleep(CHECK_INTERVAL)
             continue
 
@@ -88,11 +91,11 @@ def trading_loop() -> None:
         if state.start_equity:
             daily_change = (equity - state.start_equity) / state.start_equity
             if daily_change <= -INTRADAY_EQUITY_GUARD and not state.trading_halted:
-                log_status(f"Equity guard {-INTRADAY_EQUITY_GUARD*100:.2f}% hit. Pausing entries.")
+                log_status(f"Equity guard {-INTRADAY_EQUITY_GUARD*100:.2f}% hit. Pausing entries.", now=now)
                 state.halt_trading()
             if daily_change <= -DAILY_LOSS_LIMIT:
                 if not state.trading_halted:
-                    log_status(f"Daily loss {daily_change * 100:.2f}% hit. Halting for the day.")
+                    log_status(f"Daily loss {daily_change * 100:.2f}% hit. Halting for the day.", now=now)
                     state.halt_trading()
                 execution.close_all_positions(API, reason="Daily loss limit reached")
 
@@ -104,12 +107,12 @@ def trading_loop() -> None:
             continue
 
         if not data.is_market_open(API):
-            log_status("Market closed. Waiting...")
+            log_status("Market closed. Waiting...", now=now)
             time.sleep(CHECK_INTERVAL)
             continue
 
         if not data.within_trading_window(now):
-            log_status("Outside trading window. Waiting...")
+            log_status("Outside trading window. Waiting...", now=now)
             time.sleep(CHECK_INTERVAL)
             continue
 
@@ -117,24 +120,27 @@ def trading_loop() -> None:
         try:
             positions = API.list_positions()
         except Exception as exc:
-            log_status(f"Could not list positions: {exc}")
+            log_status(f"Could not list positions: {exc}", now=now)
             time.sleep(CHECK_INTERVAL)
             continue
 
+        position_bars = data.fetch_recent_bars_multi(API, [p.symbol for p in positions], limit=150)
+        exited = set()
         for pos in positions:
-            bars = data.fetch_recent_bars(API, pos.symbol, limit=150)
+            bars = position_bars.get(pos.symbol)
             if bars is None:
                 continue
             exit_info = execution.manage_open_position(API, pos.symbol, bars, day_start)
             if exit_info:
                 reason, entry_px, exit_px, qty = exit_info
+                exited.add(pos.symbol)
                 pnl = (exit_px - entry_px) * qty
                 state.update_metrics(pos.symbol, pnl, entry_px, exit_px)
-                log_status(f"Exited {pos.symbol} via {reason} | Entry: {entry_px:.2f} Exit: {exit_px:.2f} PnL: ${pnl:.2f}")
+                log_status(f"Exited {pos.symbol} via {reason} | Entry: {entry_px:.2f} Exit: {exit_px:.2f} PnL: ${pnl:.2f}", now=now)
 
         # If trading is halted, skip entries.
         if state.trading_halted:
-            log_status("Trading halted for safety. Standing by.")
+            log_status("Trading halted for safety. Standing by.", now=now)
             display_dashboard(state, equity)
             time.sleep(CHECK_INTERVAL)
             continue
@@ -145,7 +151,7 @@ def trading_loop() -> None:
         universe = data.build_trending_universe(API)
         SNAPSHOTS.update(
             status={
-                "timestamp": datetime.now(TIMEZONE).isoformat(),
+                "timestamp": now.isoformat(),
                 "trading_halted": state.trading_halted,
                 "benchmark_perf": benchmark_perf,
             },
@@ -163,21 +169,29 @@ def trading_loop() -> None:
         )
 
         if not universe:
-            log_status("No trending symbols found this cycle.")
+            log_status("No trending symbols found this cycle.", now=now)
             time.sleep(CHECK_INTERVAL)
             continue
 
+        # Reuse this cycle's positions snapshot minus anything just exited; only our own buys
+        # below change it.
+        open_positions = [p for p in positions if p.symbol not in exited]
+        held_symbols = {p.symbol for p in open_positions}
+        current_exposure = sum(float(p.market_value) for p in open_positions)
+
+        # First pass: local checks only, gathering candidates that signal an entry.
+        signaled = []
         for candidate in universe:
             symbol = candidate["symbol"]
             if state.has_traded_symbol(symbol):
                 continue
 
             # Skip if already holding the symbol.
-            if execution.get_position(API, symbol):
+            if symbol in held_symbols:
                 continue
 
             if state.symbol_in_cooldown(symbol, SYMBOL_COOLDOWN_MIN):
-                log_status(f"{symbol}: in cooldown after loss; skipping.")
+                log_status(f"{symbol}: in cooldown after loss; skipping.", now=now)
                 continue
 
             bars = candidate["bars"]
@@ -188,43 +202,51 @@ def trading_loop() -> None:
             }
 
             signal, entry_price, reason = strategy.check_entry_signal(
-                bars, benchmark_perf, metrics, candidate.get("vol_ratio")
+                bars, benchmark_perf, metrics, candidate.get("vol_ratio"), symbol=symbol
             )
             if not signal or entry_price is None:
                 continue
 
-            # Liquidity and spread guards
-            if not data.bar_meets_dollar_volume(bars):
-                log_status(f"{symbol}: skipped, low dollar volume on last bar.")
-                continue
-            if not data.latest_spread_ok(API, symbol):
-                log_status(f"{symbol}: skipped, spread too wide.")
+            # Size first: zero-size entries are rejected without any API calls.
+            qty = risk.calculate_position_size(equity, entry_price)
+            if qty <= 0:
+                log_status(f"{symbol}: position size zero (risk cap).", now=now)
                 continue
 
-            if execution.has_open_order(API, symbol):
-                log_status(f"{symbol}: open order exists; skipping new order.")
+            # Liquidity guard
+            if not data.bar_meets_dollar_volume(bars):
+                log_status(f"{symbol}: skipped, low dollar volume on last bar.", now=now)
                 continue
 
+            signaled.append((candidate, entry_price, reason, qty))
+
+        # One quotes request covers every candidate that reached the spread check.
+        spreads_ok = data.latest_spreads_ok(API, [c["symbol"] for c, *_ in signaled])
+        # Open orders only matter once something has signaled; skip the request otherwise.
+        open_order_symbols = execution.open_order_symbols(API) if signaled else set()
+
+        for candidate, entry_price, reason, qty in signaled:
+            symbol = candidate["symbol"]
+            stop_price = risk.calculate_stop_price(entry_price)
+
             # Exposure cap: do not exceed total open exposure limit.
-            try:
-                positions = API.list_positions()
-            except Exception:
-                positions = []
-            current_exposure = sum(float(p.market_value) for p in positions)
             prospective_value = qty * entry_price
             if (current_exposure + prospective_value) > (equity * MAX_TOTAL_EXPOSURE_PCT):
-                log_status(f"{symbol}: skipping, exposure cap reached ({MAX_TOTAL_EXPOSURE_PCT*100:.0f}% of equity).")
+                log_status(f"{symbol}: skipping, exposure cap reached ({MAX_TOTAL_EXPOSURE_PCT*100:.0f}% of equity).", now=now)
                 continue
 
-            qty = risk.calculate_position_size(equity, entry_price)
-            if qty <= 0:
-                log_status(f"{symbol}: position size zero (risk cap).")
+            if not spreads_ok.get(symbol, False):
+                log_status(f"{symbol}: skipped, spread too wide.", now=now)
+                continue
+
+            if symbol in open_order_symbols:
+                log_status(f"{symbol}: open order exists; skipping new order.", now=now)
                 continue
 
-            stop_price = risk.calculate_stop_price(entry_price)
             log_status(
                 f"BUY {symbol} | Qty: {qty} | Entry: {entry_price:.2f} | Stop: {stop_price:.2f} | "
-                f"Score: {candidate['score']:.2f} | Reason: {reason}"
+                f"Score: {candidate['score']:.2f} | Reason: {reason}",
+                now=now,
             )
 
             try:
@@ -232,8 +254,9 @@ def trading_loop() -> None:
                 state.record_trade()
                 state.record_symbol_trade(symbol)
             except Exception as exc:
-                log_status(f"{symbol}: order placement failed: {exc}")
+                log_status(f"{symbol}: order placement failed: {exc}", now=now)
                 continue
+            current_exposure += prospective_value
 
         display_dashboard(state, equity)
         time.sleep(CHECK_INTERVAL)
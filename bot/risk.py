@@ -1,4 +1,3 @@
-import math
 from typing import Optional
 
 from .config import (
@@ -9,10 +8,15 @@ from .config import (
     TRAIL_TRIGGER_PCT,
 )
 
+# Sizing constants folded once at import: qty = equity * risk% / (entry * stop%).
+_RISK_OVER_STOP = RISK_PER_TRADE_PCT / STOP_LOSS_PCT if STOP_LOSS_PCT > 0 else 0.0
+_RISK_OVER_STOP_AGG = max(RISK_PER_TRADE_PCT, 0.01) / STOP_LOSS_PCT if STOP_LOSS_PCT > 0 else 0.0
+_ONE_MINUS_STOP = 1.0 - STOP_LOSS_PCT
+
 
 def calculate_stop_price(entry_price: float) -> float:
     """Fixed tight stop below entry to cap loss quickly."""
-    return round(entry_price * (1 - STOP_LOSS_PCT), 4)
+    return round(entry_price * _ONE_MINUS_STOP, 4)
 
 
 def calculate_position_size(account_equity: float, entry_price: float, aggressive: bool = False) -> int:
@@ -23,18 +27,9 @@ def calculate_position_size(account_equity: float, entry_price: float, aggressiv
     if account_equity <= 0 or entry_price <= 0:
         return 0
 
-    risk_pct = RISK_PER_TRADE_PCT if not aggressive else max(RISK_PER_TRADE_PCT, 0.01)
-    risk_capital = account_equity * risk_pct
-    stop_distance = entry_price * STOP_LOSS_PCT
-    if stop_distance <= 0:
-        return 0
-
-    qty = math.floor(risk_capital / stop_distance)
-    position_value = qty * entry_price
-    max_value = account_equity * MAX_POSITION_PCT
-    if position_value > max_value and entry_price > 0:
-        qty = math.floor(max_value / entry_price)
-    return max(qty, 0)
+    risk_over_stop = _RISK_OVER_STOP_AGG if aggressive else _RISK_OVER_STOP
+    qty = int(account_equity * risk_over_stop / entry_price)
+    return max(min(qty, int(account_equity * MAX_POSITION_PCT / entry_price)), 0)
 
 
 def trailing_stop_price(entry_price: float, highest_price: float) -> Optional[float]:
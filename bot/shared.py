@@ -1,7 +1,8 @@
 import threading
-from collections import deque
 from datetime import datetime
-from typing import Any, Deque, Dict, List, Optional
+from typing import Any, Dict, List, Optional
+
+import orjson
 
 from .config import TIMEZONE
 
@@ -10,22 +11,27 @@ class LogBuffer:
     """Thread-safe rotating log buffer for UI consumption."""
 
     def __init__(self, maxlen: int = 500):
-        self._buf: Deque[Dict[str, Any]] = deque(maxlen=maxlen)
+        # Fixed-size ring: writers fill slot then bump the index, readers never lock.
+        self._maxlen = maxlen
+        self._ring: List[Optional[Dict[str, Any]]] = [None] * maxlen
+        self._idx = 0
         self._lock = threading.Lock()
 
-    def add(self, level: str, message: str) -> None:
+    def add(self, level: str, message: str, ts: Optional[datetime] = None) -> None:
+        """Append an entry; `ts` lets callers reuse one timestamp for a batch of lines."""
+        entry = {
+            "ts": (ts or datetime.now(TIMEZONE)).isoformat(),
+            "level": level,
+            "message": message,
+        }
         with self._lock:
-            self._buf.append(
-                {
-                    "ts": datetime.now(TIMEZONE).isoformat(),
-                    "level": level,
-                    "message": message,
-                }
-            )
+            self._ring[self._idx % self._maxlen] = entry
+            self._idx += 1
 
     def latest(self, limit: int = 200) -> List[Dict[str, Any]]:
-        with self._lock:
-            return list(self._buf)[-limit:]
+        end = self._idx
+        count = min(max(limit, 0), end, self._maxlen)
+        return [self._ring[i % self._maxlen] for i in range(end - count, end)]
 
 
 class SnapshotStore:
@@ -33,30 +39,37 @@ class SnapshotStore:
 
     def __init__(self):
         self._lock = threading.Lock()
-        self.status: Dict[str, Any] = {}
-        self.metrics: Dict[str, Any] = {}
-        self.positions: List[Dict[str, Any]] = []
-        self.candidates: List[Dict[str, Any]] = []
+        self._current: Dict[str, Any] = {
+            "status": {},
+            "metrics": {},
+            "positions": [],
+            "candidates": [],
+        }
+        self._current_json: bytes = orjson.dumps(self._current)
 
     def update(self, *, status=None, metrics=None, positions=None, candidates=None) -> None:
+        # Writers build a new dict and publish it with one assignment; readers never lock.
         with self._lock:
+            new = dict(self._current)
             if status is not None:
-                self.status = status
+                new["status"] = status
             if metrics is not None:
-                self.metrics = metrics
+                new["metrics"] = metrics
             if positions is not None:
-                self.positions = positions
+                new["positions"] = positions
             if candidates is not None:
-                self.candidates = candidates
+                new["candidates"] = candidates
+            # Encode once per update so /snapshot reads are a plain bytes return.
+            encoded = orjson.dumps(new, option=orjson.OPT_SERIALIZE_NUMPY)
+            self._current = new
+            self._current_json = encoded
 
     def get(self) -> Dict[str, Any]:
-        with self._lock:
-            return {
-                "status": self.status,
-                "metrics": self.metrics,
-                "positions": self.positions,
-                "candidates": self.candidates,
-            }
+        return self._current
+
+    def get_json(self) -> bytes:
+        """The latest snapshot, already JSON encoded."""
+        return self._current_json
 
 
 LOG_BUFFER = LogBuffer()
@@ -1,19 +1,30 @@
-import copy
-import json
+import atexit
 import os
+import signal
+import sys
+import threading
+import time
 from datetime import date, datetime, time as dt_time
-from typing import Dict, Optional
-
-from .config import STATE_FILE, TIMEZONE
-
-# Minimal persisted state so the bot survives restarts without tracking positions locally.
-DEFAULT_STATE: Dict[str, object] = {
-    "trading_day": None,       # ISO date string
-    "start_equity": None,      # Equity at the start of the trading day
-    "trades_executed": 0,      # Count of completed trades today (all symbols)
-    "trading_halted": False,   # Set when daily loss limit is breached
-    "traded_symbols": {},      # {symbol: True} once traded today
-    "metrics": {               # Rolling intraday metrics
+from typing import Dict, Optional, Set, Tuple
+
+import orjson
+
+from .config import (
+    METRICS_CHECKPOINT_EVERY,
+    METRICS_LOG_FILE,
+    STATE_FILE,
+    STATE_SAVE_DEBOUNCE,
+    TIMEZONE,
+)
+
+# Resolved once at import; pytz zones are immutable so one reference serves every call.
+_TZ = TIMEZONE
+_MIDNIGHT = dt_time(0, 0, tzinfo=_TZ)
+
+
+def _fresh_metrics() -> Dict[str, object]:
+    """Rolling intraday metrics, built fresh so no nested dict is shared between days."""
+    return {
         "total_trades": 0,
         "wins": 0,
         "losses": 0,
@@ -22,85 +33,324 @@ DEFAULT_STATE: Dict[str, object] = {
         "pnl_by_symbol": {},   # symbol -> cumulative pnl $
         "max_equity": None,
         "max_drawdown": 0.0,
-    },
-}
+    }
+
+
+def _fresh_default() -> Dict[str, object]:
+    """Minimal persisted state so the bot survives restarts without tracking positions locally."""
+    return {
+        "trading_day": None,       # ISO date string
+        "start_equity": None,      # Equity at the start of the trading day
+        "trades_executed": 0,      # Count of completed trades today (all symbols)
+        "trading_halted": False,   # Set when daily loss limit is breached
+        "traded_today": [],        # Symbols traded today
+        "last_loss_at": {},        # {symbol: epoch seconds of the last losing exit}
+        "metrics": _fresh_metrics(),
+        "metrics_seq": 0,          # Last metrics.log event folded into this file
+    }
+
+
+# Reference copy of the schema; never mutate it, use _fresh_default() for live state.
+DEFAULT_STATE: Dict[str, object] = _fresh_default()
+
+
+def _epoch_or_none(value: object) -> Optional[float]:
+    """Epoch seconds from an epoch number or an ISO timestamp (the pre-epoch format)."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return None
 
 
 class BotState:
     """Lightweight day-level state (no position storage)."""
 
+    # Persisted fields live as plain attributes; the JSON dict is only built in save().
+    __slots__ = (
+        "trading_day",
+        "start_equity",
+        "trades_executed",
+        "trading_halted",
+        "traded_today",
+        "last_loss_at",
+        "metrics",
+        "metrics_seq",
+        "_checkpoint_seq",
+        "_metrics_log",
+        "_traded_set",
+        "_tds_cache",
+        "_lock",
+        "_dirty",
+        "_timer",
+    )
+
     def __init__(self) -> None:
-        self.state = DEFAULT_STATE.copy()
+        self._apply(_fresh_default())
+        # Closed trades are appended to METRICS_LOG_FILE; the full state is only rewritten
+        # every METRICS_CHECKPOINT_EVERY trades, on other mutations, and at shutdown.
+        self._metrics_log = None
+        # (trading_day string, its start-of-day datetime); the day changes once a day.
+        self._tds_cache: Optional[Tuple[str, datetime]] = None
+        # Mutators mark the state dirty; a short timer coalesces bursts into one write.
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._timer: Optional[threading.Timer] = None
         self.load()
+        atexit.register(self.close)
+        self._install_sigterm_flush()
+
+    def _apply(self, data: Dict[str, object]) -> None:
+        """Populate attributes from a parsed state dict, casting each field once."""
+        self.trading_day = data.get("trading_day") or None
+        equity = data.get("start_equity")
+        self.start_equity = float(equity) if equity is not None else None
+        self.trades_executed = int(data.get("trades_executed") or 0)
+        self.trading_halted = bool(data.get("trading_halted", False))
+        self.traded_today = [sys.intern(sym) for sym in data.get("traded_today") or []]
+        self.last_loss_at = {}
+        for sym, ts in (data.get("last_loss_at") or {}).items():
+            try:
+                self.last_loss_at[sys.intern(sym)] = float(ts)
+            except (TypeError, ValueError):
+                pass
+        metrics = _fresh_metrics()
+        metrics.update(data.get("metrics") or {})
+        metrics["pnl_by_symbol"] = {
+            sys.intern(sym): pnl for sym, pnl in (metrics["pnl_by_symbol"] or {}).items()
+        }
+        self.metrics = metrics
+        self.metrics_seq = int(data.get("metrics_seq") or 0)
+        self._checkpoint_seq = self.metrics_seq
+        # Runtime mirror of traded_today for O(1) membership checks.
+        self._traded_set: Set[str] = set(self.traded_today)
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "trading_day": self.trading_day,
+            "start_equity": self.start_equity,
+            "trades_executed": self.trades_executed,
+            "trading_halted": self.trading_halted,
+            "traded_today": self.traded_today,
+            "last_loss_at": self.last_loss_at,
+            "metrics": self.metrics,
+            "metrics_seq": self.metrics_seq,
+        }
 
     def load(self) -> None:
+        stored = None
         if os.path.exists(STATE_FILE):
             try:
-                with open(STATE_FILE, "r", encoding="utf-8") as f:
-                    stored = json.load(f)
-                for key in DEFAULT_STATE:
-                    if key in stored:
-                        self.state[key] = stored[key]
+                with open(STATE_FILE, "rb") as f:
+                    stored = orjson.loads(f.read())
+                self._apply(stored)
+                legacy = stored.get("traded_symbols")
+                if isinstance(legacy, dict):
+                    self._migrate_traded_symbols(legacy)
+                if not self._replay_metrics_log():
+                    # Force a checkpoint so the torn line is truncated before new appends.
+                    stored = None
             except Exception:
                 # Corrupt or unreadable state gets reset for safety.
-                self.state = DEFAULT_STATE.copy()
-        self.save()
+                self._apply(_fresh_default())
+                stored = None
+        # Only rewrite when the file is missing, unreadable, or not already in canonical shape.
+        if stored != self.as_dict():
+            self.save()
+
+    def _migrate_traded_symbols(self, legacy: Dict[str, object]) -> None:
+        """Split the old {symbol: True | {"last_loss_at": ...}} map into the flat keys."""
+        for sym, info in legacy.items():
+            sym = sys.intern(sym)
+            # A loss entry replaced the True flag in older files, so any dict means traded.
+            if (isinstance(info, dict) or info) and sym not in self._traded_set:
+                self._traded_set.add(sym)
+                self.traded_today.append(sym)
+            if isinstance(info, dict) and "last_loss_at" in info:
+                loss_at = _epoch_or_none(info["last_loss_at"])
+                if loss_at is not None:
+                    self.last_loss_at.setdefault(sym, loss_at)
+
+    def _replay_metrics_log(self) -> bool:
+        """Fold trade events newer than the last checkpoint back into the in-memory metrics.
+
+        Returns False if any line was torn or belongs to another trading day, so the caller
+        checkpoints and truncates the log.
+        """
+        if not os.path.exists(METRICS_LOG_FILE):
+            return True
+        clean = True
+        with open(METRICS_LOG_FILE, "rb") as f:
+            for line in f:
+                try:
+                    event = orjson.loads(line)
+                    if event["d"] != self.trading_day:
+                        # Left over from a previous day (e.g. a crash between the new-day
+                        # checkpoint and the truncate); sequence numbers restart each day.
+                        clean = False
+                        continue
+                    seq = int(event["n"])
+                    if seq <= self.metrics_seq:
+                        continue
+                    self._apply_trade(sys.intern(event["s"]), float(event["p"]), float(event["t"]))
+                except Exception:
+                    # A crash mid-append can leave a torn last line; skip it.
+                    clean = False
+                    continue
+                self.metrics_seq = seq
+        return clean
+
+    def _append_metrics_event(self, symbol: str, pnl_dollars: float, ts: float) -> bool:
+        try:
+            if self._metrics_log is None:
+                # Unbuffered append: each event reaches the OS in a single write.
+                self._metrics_log = open(METRICS_LOG_FILE, "ab", buffering=0)
+            event = {"n": self.metrics_seq, "d": self.trading_day, "s": symbol, "p": pnl_dollars, "t": ts}
+            self._metrics_log.write(orjson.dumps(event) + b"\n")
+            return True
+        except Exception as exc:
+            print(f"Warning: could not append metrics event: {exc}")
+            return False
 
     def save(self) -> None:
-        with open(STATE_FILE, "w", encoding="utf-8") as f:
-            json.dump(self.state, f, indent=2)
+        # Encode once, write a temp file in one call, then rename over the old file so a
+        # crash mid-write never leaves a truncated state file behind.
+        with self._lock:
+            data = orjson.dumps(self.as_dict(), option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+            tmp = STATE_FILE + ".tmp"
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                os.write(fd, data)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            os.replace(tmp, STATE_FILE)
+            # Every logged event is now part of the checkpoint.
+            self._checkpoint_seq = self.metrics_seq
+            if self._metrics_log is not None:
+                self._metrics_log.truncate(0)
+            elif os.path.exists(METRICS_LOG_FILE):
+                os.truncate(METRICS_LOG_FILE, 0)
+
+    def mark_dirty(self) -> None:
+        """Schedule a save; repeated calls within the debounce window share one write."""
+        with self._lock:
+            self._dirty = True
+            if self._timer is None:
+                self._timer = threading.Timer(STATE_SAVE_DEBOUNCE, self._flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _flush(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return
+            try:
+                self.save()
+                self._dirty = False
+            except Exception as exc:
+                print(f"Warning: could not save state: {exc}")
+
+    def close(self) -> None:
+        """Checkpoint any logged trades not yet in the state file, then write pending state."""
+        with self._lock:
+            if self.metrics_seq != self._checkpoint_seq:
+                self._dirty = True
+            self._flush()
+            if self._metrics_log is not None:
+                self._metrics_log.close()
+                self._metrics_log = None
+
+    def _install_sigterm_flush(self) -> None:
+        # Signal handlers can only be installed from the main thread.
+        if threading.current_thread() is not threading.main_thread():
+            return
+        previous = signal.getsignal(signal.SIGTERM)
+
+        def handler(signum, frame):
+            self.close()
+            if callable(previous):
+                previous(signum, frame)
+            else:
+                raise SystemExit(0)
+
+        signal.signal(signal.SIGTERM, handler)
 
     def reset_for_day(self, today: date, start_equity: float) -> None:
         """Reset counters when a new trading day starts."""
         today_str = today.isoformat()
-        if self.state["trading_day"] != today_str:
-            self.state["trading_day"] = today_str
-            self.state["start_equity"] = start_equity
-            self.state["trades_executed"] = 0
-            self.state["trading_halted"] = False
-            self.state["traded_symbols"] = {}
-            self.state["metrics"] = copy.deepcopy(DEFAULT_STATE["metrics"])
-            self.save()
+        with self._lock:
+            if self.trading_day != today_str:
+                self.trading_day = today_str
+                self.start_equity = float(start_equity)
+                self.trades_executed = 0
+                self.trading_halted = False
+                self.traded_today = []
+                self.last_loss_at = {}
+                self._traded_set = set()
+                self.metrics = _fresh_metrics()
+                self.metrics_seq = 0
+                # Checkpoint now so the log starts empty for the new day; any event that
+                # survives a crash here is tagged with the old day and skipped on replay.
+                self._dirty = True
+                self._flush()
 
     def record_trade(self) -> None:
-        self.state["trades_executed"] += 1
-        self.save()
+        with self._lock:
+            self.trades_executed += 1
+            self.mark_dirty()
 
     def record_symbol_trade(self, symbol: str) -> None:
-        traded = self.state.get("traded_symbols", {})
-        traded[symbol] = True
-        self.state["traded_symbols"] = traded
-        self.save()
+        symbol = sys.intern(symbol)
+        with self._lock:
+            if symbol in self._traded_set:
+                return
+            self._traded_set.add(symbol)
+            self.traded_today.append(symbol)
+            self.mark_dirty()
 
     def has_traded_symbol(self, symbol: str) -> bool:
-        return bool(self.state.get("traded_symbols", {}).get(symbol, False))
+        return symbol in self._traded_set
 
     def halt_trading(self) -> None:
-        self.state["trading_halted"] = True
-        self.save()
+        with self._lock:
+            if self.trading_halted:
+                return
+            self.trading_halted = True
+            self.mark_dirty()
 
     def trading_day_start(self) -> Optional[datetime]:
         """Return the start-of-day timestamp in Eastern time."""
-        day = self.state.get("trading_day")
+        day = self.trading_day
         if not day:
             return None
-        return datetime.combine(date.fromisoformat(day), dt_time(0, 0, tzinfo=TIMEZONE))
-
-    @property
-    def start_equity(self) -> Optional[float]:
-        val = self.state.get("start_equity")
-        return float(val) if val is not None else None
-
-    @property
-    def trades_executed(self) -> int:
-        return int(self.state.get("trades_executed", 0))
-
-    @property
-    def trading_halted(self) -> bool:
-        return bool(self.state.get("trading_halted", False))
+        cached = self._tds_cache
+        if cached is not None and cached[0] == day:
+            return cached[1]
+        start = datetime.combine(date.fromisoformat(day), _MIDNIGHT)
+        self._tds_cache = (day, start)
+        return start
 
     def update_metrics(self, symbol: str, pnl_dollars: float, entry: float, exit: float) -> None:
-        m = self.state["metrics"]
+        symbol = sys.intern(symbol)
+        with self._lock:
+            now = time.time()
+            self._apply_trade(symbol, pnl_dollars, now)
+            self.metrics_seq += 1
+            # The event line is enough to rebuild this trade (and its cooldown) on load;
+            # the full state is only rewritten every METRICS_CHECKPOINT_EVERY trades.
+            logged = self._append_metrics_event(symbol, pnl_dollars, now)
+            if not logged or self.metrics_seq - self._checkpoint_seq >= METRICS_CHECKPOINT_EVERY:
+                self.mark_dirty()
+
+    def _apply_trade(self, symbol: str, pnl_dollars: float, ts: float) -> None:
+        m = self.metrics
         m["total_trades"] += 1
         if pnl_dollars >= 0:
             m["wins"] += 1
@@ -108,38 +358,29 @@ class BotState:
         else:
             m["losses"] += 1
             m["gross_loss"] += pnl_dollars
-        by_symbol = m.get("pnl_by_symbol", {})
+        by_symbol = m["pnl_by_symbol"]
         by_symbol[symbol] = by_symbol.get(symbol, 0.0) + pnl_dollars
-        m["pnl_by_symbol"] = by_symbol
-        self.state["metrics"] = m
-        self.save()
 
         # Track last loss time for cooldowns
         if pnl_dollars < 0:
-            traded = self.state.get("traded_symbols", {})
-            traded[symbol] = {"last_loss_at": datetime.now(TIMEZONE).isoformat()}
-            self.state["traded_symbols"] = traded
-            self.save()
+            self.last_loss_at[symbol] = ts
 
     def update_drawdown(self, equity: float) -> None:
-        m = self.state["metrics"]
-        if m.get("max_equity") is None or equity > m["max_equity"]:
-            m["max_equity"] = equity
-        if m["max_equity"]:
-            dd = (equity - m["max_equity"]) / m["max_equity"]
-            m["max_drawdown"] = min(m.get("max_drawdown", 0.0), dd)
-        self.state["metrics"] = m
-        self.save()
-
-    def symbol_in_cooldown(self, symbol: str, cooldown_minutes: int) -> bool:
-        traded = self.state.get("traded_symbols", {})
-        info = traded.get(symbol)
-        if not info or "last_loss_at" not in info:
-            return False
-        try:
-            ts = datetime.fromisoformat(info["last_loss_at"]).astimezone(TIMEZONE)
-        except Exception:
-            return False
-        delta = datetime.now(TIMEZONE) - ts
-        return delta.total_seconds() < cooldown_minutes * 60
+        with self._lock:
+            m = self.metrics
+            before = (m["max_equity"], m["max_drawdown"])
+            if m["max_equity"] is None or equity > m["max_equity"]:
+                m["max_equity"] = equity
+            if m["max_equity"]:
+                dd = (equity - m["max_equity"]) / m["max_equity"]
+                m["max_drawdown"] = min(m["max_drawdown"], dd)
+            # Called every cycle; only a new high or a deeper drawdown needs a write.
+            if (m["max_equity"], m["max_drawdown"]) != before:
+                self.mark_dirty()
 
+    def symbol_in_cooldown(self, symbol: str, cooldown_minutes: int, _now=time.time) -> bool:
+        # Epoch floats on both sides: one clock read and a subtraction, no datetimes.
+        last_loss_at = self.last_loss_at.get(symbol)
+        if last_loss_at is None:
+            return False
+        return (_now() - last_loss_at) < cooldown_minutes * 60
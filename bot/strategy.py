@@ -1,22 +1,24 @@
 from typing import Dict, Optional, Tuple
 
-import pandas as pd
-
 from .config import EMA_FAST, EMA_SLOW, PULLBACK_TOLERANCE_PCT
+from .data import BarArrays, completed_emas
 
-
-def add_trend_columns(bars: pd.DataFrame) -> pd.DataFrame:
-    enriched = bars.copy()
-    enriched["ema21"] = enriched["close"].ewm(span=EMA_FAST, adjust=False).mean()
-    enriched["ema50"] = enriched["close"].ewm(span=EMA_SLOW, adjust=False).mean()
-    return enriched
+# Smoothing factors for ewm(span=..., adjust=False).
+_A_FAST = 2.0 / (EMA_FAST + 1)
+_A_SLOW = 2.0 / (EMA_SLOW + 1)
 
 
 def check_entry_signal(
-    bars: Optional[pd.DataFrame],
+    bars: Optional[BarArrays],
     benchmark_perf: float,
     recent_metrics: Dict[str, Optional[float]],
     volume_ratio: Optional[float],
+    symbol: Optional[str] = None,
+    # Bound as defaults so the hot path reads locals instead of module globals.
+    _tol: float = PULLBACK_TOLERANCE_PCT,
+    _a_fast: float = _A_FAST,
+    _a_slow: float = _A_SLOW,
+    _min_bars: int = EMA_SLOW + 2,
 ) -> Tuple[bool, Optional[float], str]:
     """
     Trend + pullback + break confirmation:
@@ -30,33 +32,42 @@ def check_entry_signal(
     if bars is None:
         return False, None, "No market data."
 
-    if len(bars) < EMA_SLOW + 2:
+    # Cheapest, most selective filters first: most symbols exit before any EMA work.
+    if volume_ratio is None or volume_ratio < 1.2:
+        return False, None, "Volume not above recent average."
+
+    # Relative strength vs benchmark intraday performance
+    if (recent_metrics.get("ret_day") or 0.0) <= benchmark_perf:
+        return False, None, "Fails relative strength vs benchmark."
+
+    if len(bars["close"]) < _min_bars:
         return False, None, "Not enough candles for EMAs."
 
-    enriched = add_trend_columns(bars)
-    last = enriched.iloc[-1]
-    prev = enriched.iloc[-2]
+    # Only the last two bars matter; pull them out once as plain floats.
+    c1 = float(bars["close"][-1])
+    l2 = float(bars["low"][-2])
+    h2 = float(bars["high"][-2])
 
-    if last.ema21 <= last.ema50 or last.close <= last.ema50:
+    # EMAs through the prior (completed) bar come from the shared per-symbol state; the
+    # newest bar may still be forming, so its step is always applied fresh.
+    ef2, es2 = completed_emas(bars, symbol)
+    ef1 = _a_fast * c1 + (1.0 - _a_fast) * ef2
+    es1 = _a_slow * c1 + (1.0 - _a_slow) * es2
+
+    if ef1 <= es1 or c1 <= es1:
         return False, None, "Trend not strong enough."
 
-    # Pullback check: prior candle low within tolerance of EMA21
-    pullback_ok = abs(prev.low - prev.ema21) / prev.ema21 <= PULLBACK_TOLERANCE_PCT
-    break_confirmation = last.close > prev.high
+    # Pullback check: prior candle low within tolerance of EMA21. EMAs of positive prices
+    # are positive, so the relative tolerance multiplies out and the division goes away.
+    diff = l2 - ef2
+    tol_abs = _tol * ef2
+    pullback_ok = -tol_abs <= diff <= tol_abs
+    break_confirmation = c1 > h2
 
     if not (pullback_ok and break_confirmation):
         return False, None, "No pullback + break confirmation."
 
-    if volume_ratio is None or volume_ratio < 1.2:
-        return False, None, "Volume not above recent average."
-
-    # Relative strength vs benchmark intraday performance
-    day_ret = recent_metrics.get("ret_day") or 0.0
-    if day_ret <= benchmark_perf:
-        return False, None, "Fails relative strength vs benchmark."
-
     reason = (
         "Uptrend (21>50), pullback to 21, break above prior high, RS > benchmark, volume confirmed."
     )
-    return True, float(last.close), reason
-
+    return True, c1, reason